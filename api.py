@@ -1,16 +1,38 @@
-from flask import Flask, request, jsonify
+import os
+
+import orjson
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that (de)serializes with orjson instead of the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # allow cross-origin access (frontend to backend)
 
+
+def json_response(payload, status=200):
+    """Serialize payload with orjson straight into a JSON Response (no jsonify round-trip)."""
+    return Response(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
 @app.route("/", methods=["GET"])
 def home():
     """Root route to confirm the server is running"""
     try:
-        return jsonify({"message": "Flask API is running successfully!"}), 200
+        return json_response({"message": "Flask API is running successfully!"}, 200)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return json_response({"error": str(e)}, 500)
 
 
 @app.route("/api/data", methods=["POST"])
@@ -21,44 +43,45 @@ def receive_data():
     """
     try:
         # Try to get JSON data from request body
-        data = request.get_json(force=True)
+        data = orjson.loads(request.get_data())
         if not data:
-            return jsonify({"status": "failed", "message": "No JSON data received"}), 400
+            return json_response({"status": "failed", "message": "No JSON data received"}, 400)
 
         # Example: handle or log data
         print("Received data:", data)
 
         # Return success response
-        return jsonify({
+        return json_response({
             "status": "success",
             "message": "Data received successfully",
             "received_data": data
-        }), 200
+        }, 200)
 
     except Exception as e:
         # Handle parsing or unexpected server errors
         print("Error in /api/data:", e)
-        return jsonify({
+        return json_response({
             "status": "error",
             "message": f"An error occurred: {str(e)}"
-        }), 500
+        }, 500)
 
 
 @app.errorhandler(404)
 def not_found(e):
     """Handle 404 errors gracefully"""
-    return jsonify({"error": "Route not found"}), 404
+    return json_response({"error": "Route not found"}, 404)
 
 
 @app.errorhandler(500)
 def server_error(e):
     """Handle internal server errors gracefully"""
-    return jsonify({"error": "Internal server error"}), 500
+    return json_response({"error": "Internal server error"}, 500)
 
 
 if __name__ == "__main__":
     try:
-        print("Starting Flask API on port 5000...")
-        app.run(host="0.0.0.0", port=8080, debug=True)
+        # Development server only; production runs `gunicorn -c gunicorn.conf.py wsgi:application`
+        print("Starting Flask API on port 8080...")
+        app.run(host="0.0.0.0", port=8080, debug=bool(os.environ.get("DEV")))
     except Exception as e:
         print("Error starting the Flask app:", e)
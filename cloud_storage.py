@@ -1,35 +1,70 @@
+import codecs
+import functools
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional
+
+from db_pool import ConnectionPool, normalize_path
 
 DB_PATH = Path(__file__).parent / "cloud_data.db"
 
-def read_all_strings_from_cloud(db_path: Optional[str] = None) -> list:
-    """
-    Reads all stored text entries from the SQLite3 database and returns them as a list of dicts.
-    Each dict contains: id, text, created_at
-    """
-    db_file = db_path or str(DB_PATH)
-    conn = sqlite3.connect(db_file)
-    try:
-        cur = conn.cursor()
-        cur.execute("""
+# Chunk size used when streaming file contents into a row
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_POOL_LOCK = threading.Lock()
+
+# Streamed rows are stored as UTF-8 blobs, so reads cast them back to text
+SELECT_ALL_SQL = "SELECT id, CAST(text AS TEXT) AS text, created_at FROM cloud_strings ORDER BY id ASC"
+INSERT_TEXT_SQL = "INSERT INTO cloud_strings (text) VALUES (?)"
+INSERT_ZEROBLOB_SQL = "INSERT INTO cloud_strings (text) VALUES (zeroblob(?))"
+
+@functools.lru_cache(maxsize=None)
+def _open_pool(db_file: str) -> ConnectionPool:
+    pool = ConnectionPool(db_file)
+    with pool.writer() as conn:
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS cloud_strings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 text TEXT NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        cur.execute("SELECT id, text, created_at FROM cloud_strings ORDER BY id ASC")
-        rows = cur.fetchall()
-        return [ {"id": r[0], "text": r[1], "created_at": r[2]} for r in rows ]
-    finally:
-        conn.close()
+    return pool
 
-def store_txt_file_in_cloud(txt_file_path: str, db_path: Optional[str] = None) -> int:
+def _get_pool(db_path: Optional[str] = None) -> ConnectionPool:
     """
-    Accepts a path to a .txt file, reads its contents, and stores it in a SQLite3 database (cloud_data.db).
-    Returns the inserted row id.
+    Returns the process-wide connection pool for the database, creating the table on first use.
+    """
+    # "x.db", "./x.db" and the absolute path must share one pool (and one writer lock)
+    db_file = normalize_path(db_path or DB_PATH)
+    with _POOL_LOCK:
+        return _open_pool(db_file)
+
+def iter_all_strings_from_cloud(db_path: Optional[str] = None) -> Iterator[dict]:
+    """
+    Yields stored text entries one at a time as dicts (id, text, created_at), oldest first,
+    without loading the whole table. A pooled reader connection is held until the generator finishes.
+    """
+    with _get_pool(db_path).reader() as conn:
+        cur = conn.cursor()
+        cur.row_factory = sqlite3.Row
+        cur.execute(SELECT_ALL_SQL)
+        for row in cur:
+            yield dict(row)
+
+def read_all_strings_from_cloud(db_path: Optional[str] = None) -> list:
+    """
+    Reads all stored text entries from the SQLite3 database and returns them as a list of dicts.
+    Each dict contains: id, text, created_at
+    """
+    return list(iter_all_strings_from_cloud(db_path))
+
+def _read_txt_file(txt_file_path: str) -> str:
+    """
+    Reads a .txt file for storage, rejecting missing or empty files (and raising
+    UnicodeDecodeError for files that are not UTF-8).
     """
     file_path = Path(txt_file_path)
     if not file_path.is_file():
@@ -37,22 +72,63 @@ def store_txt_file_in_cloud(txt_file_path: str, db_path: Optional[str] = None) -
     text = file_path.read_text(encoding="utf-8")
     if not text:
         raise ValueError("Text file is empty.")
-    db_file = db_path or str(DB_PATH)
-    conn = sqlite3.connect(db_file)
-    try:
+    return text
+
+def store_many_txt_files_in_cloud(txt_file_paths: Iterable[str], db_path: Optional[str] = None) -> List[int]:
+    """
+    Accepts an iterable of .txt file paths and stores each file's contents as its own row,
+    inside a single transaction so the whole batch pays for one commit.
+    Returns the inserted row ids in input order. If any file is missing, empty or not UTF-8 nothing is stored.
+    """
+    with _get_pool(db_path).writer() as conn:
         cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS cloud_strings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                text TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        cur.execute("INSERT INTO cloud_strings (text) VALUES (?)", (text,))
-        conn.commit()
-        return cur.lastrowid
-    finally:
-        conn.close()
+        texts = (_read_txt_file(path) for path in txt_file_paths)
+        cur.executemany(INSERT_TEXT_SQL, ((text,) for text in texts))
+        count = cur.rowcount
+        # The write lock is held for the whole batch, so the new ids are contiguous
+        last_id = cur.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - count + 1, last_id + 1))
+
+def store_txt_file_in_cloud(txt_file_path: str, db_path: Optional[str] = None) -> int:
+    """
+    Accepts a path to a .txt file, reads its contents, and stores it in a SQLite3 database (cloud_data.db).
+    The file is streamed into the row in chunks, so it is never loaded into memory as a whole.
+    Each chunk is checked as UTF-8 on the way in; an invalid file raises UnicodeDecodeError and nothing is stored.
+    A file that changes size during the copy raises ValueError and nothing is stored.
+    Returns the inserted row id.
+    """
+    file_path = Path(txt_file_path)
+    if not file_path.is_file():
+        raise FileNotFoundError(f"File not found: {txt_file_path}")
+    size = file_path.stat().st_size
+    if not size:
+        raise ValueError("Text file is empty.")
+    with file_path.open("rb") as src, _get_pool(db_path).writer() as conn:
+        row_id = conn.execute(INSERT_ZEROBLOB_SQL, (size,)).lastrowid
+        # readers CAST the blob back to TEXT, so reject anything that is not valid UTF-8
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        written = 0
+        with conn.blobopen("cloud_strings", "text", row_id) as blob:
+            while written < size and (chunk := src.read(min(STREAM_CHUNK_SIZE, size - written))):
+                decoder.decode(chunk)
+                blob.write(chunk)
+                written += len(chunk)
+        # the blob was sized up front; a file that shrank would leave trailing NULs
+        # and one that grew would be cut off, so roll back instead
+        if written != size or src.read(1):
+            raise ValueError(f"File changed size while being stored: {txt_file_path}")
+        decoder.decode(b"", final=True)
+    return row_id
+
+@contextmanager
+def stream_text(row_id: int, db_path: Optional[str] = None) -> Iterator[sqlite3.Blob]:
+    """
+    Opens a read-only, file-like handle on the stored entry with the given id so large texts
+    can be read in chunks. Reads return raw UTF-8 bytes; the handle is only valid inside the with-block.
+    """
+    with _get_pool(db_path).reader() as conn:
+        with conn.blobopen("cloud_strings", "text", row_id, readonly=True) as blob:
+            yield blob
 
 if __name__ == "__main__":
     # Example usage: store a txt file and read all stored entries
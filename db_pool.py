@@ -0,0 +1,147 @@
+"""Tiny SQLite connection pool shared by the storage modules.
+
+Each pool owns one writer connection (guarded by a lock, so writes are
+serialized) and up to ``os.cpu_count()`` reader connections that are created
+lazily and handed out through a queue. Connections stay open for the life of
+the process, so requests no longer pay for opening the database, its -wal and
+-shm files, and warming the page cache on every call.
+
+Usage:
+    pool = ConnectionPool("data.db")
+    with pool.writer() as conn:
+        conn.execute("INSERT ...")
+    with pool.reader() as conn:
+        rows = conn.execute("SELECT ...").fetchall()
+"""
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Per-connection prepared statement cache (sqlite3 defaults to 100); pooled
+# connections live for the whole process, so their statements are worth keeping
+STATEMENT_CACHE_SIZE = 256
+# Page cache per connection (32 MiB) and memory-mapped I/O window (256 MiB)
+CACHE_SIZE_KIB = 32768
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def normalize_path(db_path: Path | str) -> str:
+    """Resolve a DB path to one absolute spelling, so each file gets exactly one pool."""
+    if str(db_path) == ":memory:":
+        return ":memory:"
+    return str(Path(db_path).resolve())
+
+
+def configure_conn(con: sqlite3.Connection, db_path: Path | str, readonly: bool = False) -> None:
+    """Apply per-connection PRAGMAs (WAL journaling, relaxed fsync, in-memory temp, page cache and mmap)."""
+    if str(db_path) != ":memory:" and not readonly:
+        # WAL is persistent on disk and cannot be used for in-memory databases;
+        # read-only handles cannot switch it and pick it up from the file instead
+        con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA temp_store=MEMORY")
+    con.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    # read pages through a memory map instead of one pread() per page
+    con.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+
+
+class ConnectionPool:
+    """One mutex-guarded writer plus a bounded queue of reader connections."""
+
+    def __init__(self, db_path: Path | str, max_readers: Optional[int] = None) -> None:
+        self.db_path = str(db_path)
+        self.max_readers = max_readers or os.cpu_count() or 1
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._readers_lock = threading.Lock()
+        self._reader_count = 0
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        target, uri = self.db_path, False
+        if readonly and self.db_path != ":memory:":
+            # open the file itself read-only so SQLite never prepares for a write
+            target, uri = Path(self.db_path).resolve().as_uri() + "?mode=ro", True
+        # autocommit mode: transactions are opened explicitly by writer()
+        con = sqlite3.connect(
+            target,
+            uri=uri,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        configure_conn(con, self.db_path, readonly=readonly)
+        if readonly:
+            # readers never write, so SQLite can skip any lock upgrade
+            con.execute("PRAGMA query_only=1")
+        return con
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer connection inside a BEGIN IMMEDIATE ... COMMIT transaction."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            con = self._writer
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Yield a reader connection, returning it to the pool afterwards."""
+        if self.db_path == ":memory:":
+            # every in-memory connection is its own database, so read through the writer
+            with self._write_lock:
+                if self._writer is None:
+                    self._writer = self._connect()
+                yield self._writer
+            return
+        con = self._acquire_reader()
+        try:
+            yield con
+        finally:
+            self._readers.put(con)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            create = self._reader_count < self.max_readers
+            if create:
+                self._reader_count += 1
+        if not create:
+            return self._readers.get()
+        try:
+            return self._connect(readonly=True)
+        except Exception:
+            with self._readers_lock:
+                self._reader_count -= 1
+            raise
+
+    def close(self) -> None:
+        """Close the writer and every idle reader connection."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                con = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            con.close()
+            with self._readers_lock:
+                self._reader_count -= 1
@@ -0,0 +1,9 @@
+"""gunicorn settings for serving wsgi:application with gevent async workers."""
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8080")
+worker_class = "gevent"
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_connections = 1000
+keepalive = 5
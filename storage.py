@@ -4,46 +4,104 @@ Uses SQLite (no external dependencies) and provides a tiny API:
 - init_db(db_path=None)
 - save_input(text, source='form', processed=None, db_path=None) -> row id
 - get_all(limit=None, db_path=None) -> list[dict]
+- iter_all(limit=None, db_path=None) -> iterator of dicts (streams rows)
 
 The database file defaults to `data.db` next to this module.
 """
 from __future__ import annotations
 
+import functools
 import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterator
+
+from db_pool import ConnectionPool, configure_conn, normalize_path
 
 DEFAULT_DB = Path(__file__).parent / "data.db"
 
+_POOL_LOCK = threading.Lock()
+
+# SQL shared by the pooled read/write helpers below
+INSERT_INPUT_SQL = "INSERT INTO inputs (text, source, processed) VALUES (?, ?, ?)"
+SELECT_INPUTS_SQL = "SELECT id, text, source, processed, created_at FROM inputs ORDER BY id DESC"
+
+
+def _normalize(db_path: Optional[Path | str]) -> str:
+    """Map equivalent spellings of a DB path to one cache key."""
+    return normalize_path(db_path or DEFAULT_DB)
+
 
 def init_db(db_path: Optional[Path | str] = None) -> Path:
-    """Create the DB file and table if needed. Returns the Path to the DB."""
-    db_path = Path(db_path) if db_path else DEFAULT_DB
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(db_path)
+    """Create the DB file and table if needed. Returns the Path to the DB.
+
+    The schema is only created once per process for each database path.
+    """
+    return _init_db(_normalize(db_path))
+
+
+_CREATE_INPUTS_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        text TEXT NOT NULL,
+        source TEXT,
+        processed TEXT,
+        created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+    )
+"""
+
+
+def _migrate_created_at_default(con: sqlite3.Connection) -> None:
+    """Rebuild an `inputs` table created before created_at had a default.
+
+    SQLite cannot change a column default in place, so the rows are copied into a
+    new table with the current schema (keeping ids and the AUTOINCREMENT counter).
+    """
+    columns = {row[1]: row for row in con.execute("PRAGMA table_info(inputs)")}
+    # table_info rows are (cid, name, type, notnull, dflt_value, pk)
+    if columns["created_at"][4] is not None:
+        return
+    con.execute("BEGIN IMMEDIATE")
     try:
-        cur = con.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS inputs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                text TEXT NOT NULL,
-                source TEXT,
-                processed TEXT,
-                created_at TEXT NOT NULL
-            )
-            """
+        seq = con.execute("SELECT seq FROM sqlite_sequence WHERE name = 'inputs'").fetchone()
+        con.execute(_CREATE_INPUTS_SQL.format(table="inputs_migrated"))
+        con.execute(
+            "INSERT INTO inputs_migrated (id, text, source, processed, created_at) "
+            "SELECT id, text, source, processed, created_at FROM inputs"
         )
-        con.commit()
+        con.execute("DROP TABLE inputs")
+        con.execute("ALTER TABLE inputs_migrated RENAME TO inputs")
+        if seq is not None:
+            con.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'inputs'", (seq[0],))
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+
+
+@functools.lru_cache(maxsize=None)
+def _init_db(db_path_str: str) -> Path:
+    db_path = Path(db_path_str)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        configure_conn(con, db_path)
+        con.execute(_CREATE_INPUTS_SQL.format(table="inputs"))
+        _migrate_created_at_default(con)
     finally:
         con.close()
     return db_path
 
 
-def _get_conn(db_path: Optional[Path | str] = None) -> sqlite3.Connection:
-    db = init_db(db_path)
-    return sqlite3.connect(db)
+@functools.lru_cache(maxsize=None)
+def _open_pool(db_path: str) -> ConnectionPool:
+    return ConnectionPool(init_db(db_path))
+
+
+def _get_pool(db_path: Optional[Path | str] = None) -> ConnectionPool:
+    """Return the process-wide pool for db_path, creating the schema on first use."""
+    with _POOL_LOCK:
+        return _open_pool(_normalize(db_path))
 
 
 def save_input(
@@ -55,46 +113,33 @@ def save_input(
     """Save an input record and return the inserted row id."""
     if text is None:
         raise ValueError("text must not be None")
-    created_at = datetime.utcnow().isoformat()
-    conn = _get_conn(db_path)
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO inputs (text, source, processed, created_at) VALUES (?, ?, ?, ?)",
-            (text, source, processed, created_at),
+    with _get_pool(db_path).writer() as conn:
+        cur = conn.execute(
+            INSERT_INPUT_SQL,
+            (text, source, processed),
         )
-        conn.commit()
         return cur.lastrowid
-    finally:
-        conn.close()
 
 
-def get_all(limit: Optional[int] = None, db_path: Optional[Path | str] = None) -> List[Dict[str, Any]]:
-    """Return all saved inputs as a list of dicts (most recent first)."""
-    conn = _get_conn(db_path)
-    try:
+def iter_all(limit: Optional[int] = None, db_path: Optional[Path | str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield saved inputs as dicts (most recent first) without materializing the result set.
+
+    A pooled reader connection is held until the generator is exhausted or closed.
+    """
+    with _get_pool(db_path).reader() as conn:
         cur = conn.cursor()
-        q = "SELECT id, text, source, processed, created_at FROM inputs ORDER BY id DESC"
+        cur.row_factory = sqlite3.Row
         if limit:
-            q += " LIMIT ?"
-            cur.execute(q, (limit,))
+            cur.execute(SELECT_INPUTS_SQL + " LIMIT ?", (limit,))
         else:
-            cur.execute(q)
-        rows = cur.fetchall()
-        results: List[Dict[str, Any]] = []
-        for r in rows:
-            results.append(
-                {
-                    "id": r[0],
-                    "text": r[1],
-                    "source": r[2],
-                    "processed": r[3],
-                    "created_at": r[4],
-                }
-            )
-        return results
-    finally:
-        conn.close()
+            cur.execute(SELECT_INPUTS_SQL)
+        for row in cur:
+            yield dict(row)
+
+
+def get_all(limit: Optional[int] = None, db_path: Optional[Path | str] = None) -> List[Dict[str, Any]]:
+    """Return all saved inputs as a list of dicts (most recent first)."""
+    return list(iter_all(limit=limit, db_path=db_path))
 
 
 if __name__ == "__main__":
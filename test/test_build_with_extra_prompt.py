@@ -0,0 +1,48 @@
+import json
+import sqlite3
+
+from tools.run_gemini import build_prompt, build_with_extra_prompt, compile_template, read_cloud_strings, text_only_template
+
+def test_build_prompt_fills_placeholders():
+    record = {"id": 7, "route": "/api/x", "received": {"freeText": "hello"}, "ts": "now"}
+    tmpl = "[{id}] {route} @ {ts}: {text} | {received}"
+    prompt = build_prompt(tmpl, record)
+    head, received = prompt.split(" | ")
+    assert head == "[7] /api/x @ now: hello"
+    assert json.loads(received) == {"freeText": "hello"}
+
+def test_build_prompt_leaves_other_text_alone():
+    record = {"id": 1, "text": "costs $5 {id}"}
+    # unknown placeholders and dollar signs pass through untouched
+    tmpl = "Price {unknown} in $USD: {text}"
+    assert build_prompt(compile_template(tmpl), record) == "Price {unknown} in $USD: costs $5 {id}"
+
+def test_text_only_templates():
+    tmpl = "Summarize the following text:\n\n{text}\n\nSummary:"
+    assert build_prompt(tmpl, {"text": "abc"}) == "Summarize the following text:\n\nabc\n\nSummary:"
+    assert build_prompt(tmpl, {"received": {"freeText": "x"}}) == "Summarize the following text:\n\nx\n\nSummary:"
+    # repeated {text} is filled everywhere
+    assert build_prompt("{text}/{text}", {"text": None}) == "/"
+
+def test_build_with_extra_prompt_prepends():
+    record = {"text": "body"}
+    assert build_with_extra_prompt("T: {text}", record, "  Be brief.  ") == "Be brief.\n\nT: body"
+
+def test_sql_prompts_match_build_prompt(tmp_path, monkeypatch):
+    # read_cloud_strings reads cloud_data.db from the working directory
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect("cloud_data.db")
+    conn.execute("CREATE TABLE cloud_strings (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.executemany("INSERT INTO cloud_strings (text) VALUES (?)", [("plain",), ("50% off {id}",), ("caf\u00e9".encode("utf-8"),)])
+    conn.commit()
+    conn.close()
+
+    for tmpl in ["Summarize the following text:\n\n{text}\n\nSummary:", "100% {text} {other}", "{text}"]:
+        assert text_only_template(tmpl)
+        for rec in read_cloud_strings(prompt_template=tmpl):
+            prompt = rec.pop("prompt")
+            assert prompt == build_prompt(tmpl, rec)
+
+    # repeated {text} or other placeholders must stay on the Python path
+    assert not text_only_template("{text} / {text}")
+    assert not text_only_template("{id}: {text}")
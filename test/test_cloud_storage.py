@@ -7,7 +7,7 @@ from pathlib import Path
 # Import the cloud storage helper
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from cloud_storage import store_txt_file_in_cloud, read_all_strings_from_cloud
+from cloud_storage import store_txt_file_in_cloud, store_many_txt_files_in_cloud, read_all_strings_from_cloud, iter_all_strings_from_cloud, stream_text, STREAM_CHUNK_SIZE
 
 def test_store_and_retrieve_cloud(tmp_path):
     # Create a temp text file as user input
@@ -30,6 +30,141 @@ def test_store_and_retrieve_cloud(tmp_path):
     # Check created_at field exists
     assert "created_at" in records[0]
 
+def test_store_many_in_one_batch(tmp_path):
+    contents = ["first entry", "second entrée", "third entry"]
+    paths = []
+    for i, content in enumerate(contents):
+        txt_file = tmp_path / f"input{i}.txt"
+        txt_file.write_text(content, encoding="utf-8")
+        paths.append(str(txt_file))
+    db_path = tmp_path / "cloud_data.db"
+
+    row_ids = store_many_txt_files_in_cloud(paths, db_path=str(db_path))
+    assert len(row_ids) == 3
+
+    records = read_all_strings_from_cloud(db_path=str(db_path))
+    assert [r["id"] for r in records] == row_ids
+    assert [r["text"] for r in records] == contents
+    # batch rows are bound as str, so they are stored as TEXT rather than blobs
+    conn = sqlite3.connect(db_path)
+    try:
+        assert {t for (t,) in conn.execute("SELECT typeof(text) FROM cloud_strings")} == {"text"}
+    finally:
+        conn.close()
+
+def test_iter_all_streams_rows(tmp_path):
+    txt_file = tmp_path / "input.txt"
+    txt_file.write_text("streamed row", encoding="utf-8")
+    db_path = tmp_path / "cloud_data.db"
+    store_many_txt_files_in_cloud([str(txt_file)] * 3, db_path=str(db_path))
+
+    rows = iter_all_strings_from_cloud(db_path=str(db_path))
+    first = next(rows)
+    assert first["text"] == "streamed row" and set(first) == {"id", "text", "created_at"}
+    assert len(list(rows)) == 2
+
+def test_store_many_is_all_or_nothing(tmp_path):
+    good = tmp_path / "good.txt"
+    good.write_text("kept?", encoding="utf-8")
+    empty = tmp_path / "empty.txt"
+    empty.write_text("", encoding="utf-8")
+    db_path = tmp_path / "cloud_data.db"
+
+    with pytest.raises(ValueError):
+        store_many_txt_files_in_cloud([str(good), str(empty)], db_path=str(db_path))
+    assert read_all_strings_from_cloud(db_path=str(db_path)) == []
+
+def test_large_file_is_streamed_in_and_out(tmp_path):
+    # several chunks of non-ASCII text to exercise the chunked copy
+    txt_content = "héllo wörld\n" * (STREAM_CHUNK_SIZE // 4)
+    txt_file = tmp_path / "big.txt"
+    txt_file.write_text(txt_content, encoding="utf-8")
+    db_path = tmp_path / "cloud_data.db"
+
+    row_id = store_txt_file_in_cloud(str(txt_file), db_path=str(db_path))
+
+    records = read_all_strings_from_cloud(db_path=str(db_path))
+    assert records[0]["text"] == txt_content
+
+    with stream_text(row_id, db_path=str(db_path)) as blob:
+        chunks = iter(lambda: blob.read(STREAM_CHUNK_SIZE), b"")
+        assert b"".join(chunks).decode("utf-8") == txt_content
+
+def test_store_rejects_non_utf8_file(tmp_path):
+    good = tmp_path / "good.txt"
+    good.write_text("still readable", encoding="utf-8")
+    bad = tmp_path / "latin1.txt"
+    bad.write_bytes("caf\u00e9 cr\u00e8me".encode("latin-1"))
+    db_path = str(tmp_path / "cloud_data.db")
+
+    store_txt_file_in_cloud(str(good), db_path=db_path)
+    with pytest.raises(UnicodeDecodeError):
+        store_txt_file_in_cloud(str(bad), db_path=db_path)
+
+    # the rejected upload must not break reads of the rest of the table
+    assert [r["text"] for r in read_all_strings_from_cloud(db_path=db_path)] == ["still readable"]
+
+def test_store_empty_file_rejected(tmp_path):
+    txt_file = tmp_path / "empty.txt"
+    txt_file.write_text("", encoding="utf-8")
+    with pytest.raises(ValueError):
+        store_txt_file_in_cloud(str(txt_file), db_path=str(tmp_path / "cloud_data.db"))
+
+def test_store_many_rejects_non_utf8_file(tmp_path):
+    good = tmp_path / "good.txt"
+    good.write_text("kept?", encoding="utf-8")
+    bad = tmp_path / "latin1.txt"
+    bad.write_bytes("na\u00efve".encode("latin-1"))
+    db_path = str(tmp_path / "cloud_data.db")
+
+    with pytest.raises(UnicodeDecodeError):
+        store_many_txt_files_in_cloud([str(good), str(bad)], db_path=db_path)
+    assert read_all_strings_from_cloud(db_path=db_path) == []
+
+def test_cloud_db_uses_wal(tmp_path):
+    txt_file = tmp_path / "input.txt"
+    txt_file.write_text("WAL check.", encoding="utf-8")
+    db_path = tmp_path / "cloud_data.db"
+
+    store_txt_file_in_cloud(str(txt_file), db_path=str(db_path))
+
+    # journal_mode is persisted in the database file, so a fresh connection sees it
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+def test_store_rejects_file_that_changes_size(tmp_path, monkeypatch):
+    txt_file = tmp_path / "input.txt"
+    txt_file.write_text("short", encoding="utf-8")
+    db_path = tmp_path / "cloud_data.db"
+    real_stat = Path.stat
+
+    def stale_stat(self, *args, **kwargs):
+        # report the size the file had before it shrank
+        st = real_stat(self, *args, **kwargs)
+        if self == txt_file:
+            fields = list(st)
+            fields[6] += 10
+            st = os.stat_result(fields)
+        return st
+    monkeypatch.setattr(Path, "stat", stale_stat)
+
+    with pytest.raises(ValueError):
+        store_txt_file_in_cloud(str(txt_file), db_path=str(db_path))
+    monkeypatch.undo()
+    assert read_all_strings_from_cloud(db_path=str(db_path)) == []
+
+def test_path_spellings_share_one_pool(tmp_path, monkeypatch):
+    import cloud_storage
+    monkeypatch.chdir(tmp_path)
+    db_path = tmp_path / "cloud_data.db"
+    pool = cloud_storage._get_pool(str(db_path))
+    assert cloud_storage._get_pool("cloud_data.db") is pool
+    assert cloud_storage._get_pool("./cloud_data.db") is pool
+    assert pool.db_path == str(db_path.resolve())
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__])
@@ -0,0 +1,45 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from db_pool import ConnectionPool
+
+def test_concurrent_writers_and_readers(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", max_readers=2)
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+
+    def write(n):
+        for i in range(20):
+            with pool.writer() as conn:
+                conn.execute("INSERT INTO t (v) VALUES (?)", (f"{n}-{i}",))
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with pool.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 80
+    pool.close()
+
+def test_writer_rolls_back_on_error(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db")
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE t (v TEXT)")
+
+    with pytest.raises(RuntimeError):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO t (v) VALUES ('lost')")
+            raise RuntimeError("boom")
+
+    with pool.reader() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,5 +1,7 @@
+import asyncio
 import os
 import pytest
+from tools import run_gemini
 from tools.run_gemini import read_cloud_strings
 
 # This test assumes GOOGLE_API_KEY is set and google-genai is installed
@@ -29,6 +31,101 @@ def test_gemini_response():
     assert response.text.strip() != ""
     print("Gemini response:", response.text)
 
+def test_call_gemini_batch_against_stub_server(monkeypatch):
+    pytest.importorskip("aiohttp")
+    from aiohttp import web
+
+    in_flight = 0
+    peak = 0
+
+    async def generate(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        body = await request.json()
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        prompt = body["contents"][0]["parts"][0]["text"]
+        if prompt == "fail":
+            return web.json_response({"error": {"message": "bad prompt"}}, status=400)
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": prompt.upper()}]}}]})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/models/{model}", generate)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        monkeypatch.setattr(run_gemini, "GEMINI_API_URL", f"http://127.0.0.1:{port}/models/{{model}}")
+        try:
+            return await run_gemini.call_gemini_batch(["a", "fail", "b", "c"], "m", concurrency=2)
+        finally:
+            await runner.cleanup()
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    responses = asyncio.run(run())
+
+    assert [r["text"] for r in responses if isinstance(r, dict)] == ["A", "B", "C"]
+    assert isinstance(responses[1], RuntimeError) and "bad prompt" in str(responses[1])
+    assert peak <= 2
+
+def test_call_gemini_all_falls_back_to_sdk_without_api_key(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    calls = []
+    monkeypatch.setattr(run_gemini, "call_gemini", lambda prompt, model: calls.append((prompt, model)) or {"text": prompt})
+
+    async def no_rest(*args, **kwargs):
+        raise AssertionError("REST path needs GOOGLE_API_KEY")
+    monkeypatch.setattr(run_gemini, "call_gemini_batch", no_rest)
+
+    responses = run_gemini.call_gemini_all(["a", "b"])
+    assert [r["text"] for r in responses] == ["a", "b"]
+    assert calls == [("a", run_gemini.DEFAULT_SDK_MODEL), ("b", run_gemini.DEFAULT_SDK_MODEL)]
+
+def test_call_gemini_all_uses_rest_default_model(monkeypatch):
+    pytest.importorskip("aiohttp")
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    seen = {}
+
+    async def fake_batch(prompts, model, concurrency, on_response):
+        seen["model"] = model
+        return [{"text": p} for p in prompts]
+    monkeypatch.setattr(run_gemini, "call_gemini_batch", fake_batch)
+
+    run_gemini.call_gemini_all(["a"])
+    assert seen["model"] == run_gemini.DEFAULT_REST_MODEL
+
+def test_main_writes_results_in_input_order(tmp_path, monkeypatch, capsys):
+    out_file = tmp_path / "results.jsonl"
+    monkeypatch.setattr(run_gemini, "OUT_FILE", out_file)
+    monkeypatch.setattr(run_gemini, "read_inputs", lambda limit=None: [{"id": i, "text": f"t{i}"} for i in range(4)])
+
+    def reversed_calls(prompts, model, concurrency, on_response):
+        # finish the calls last-to-first, as concurrent requests may
+        for index in reversed(range(len(prompts))):
+            on_response(index, {"text": f"r{index}"})
+    monkeypatch.setattr(run_gemini, "call_gemini_all", reversed_calls)
+
+    assert run_gemini.main(["--source", "inputs", "--template", "{text}", "--call"]) == 0
+    lines = [run_gemini.json_loads(line) for line in out_file.read_text().splitlines()]
+    assert [line["record"]["id"] for line in lines] == [0, 1, 2, 3]
+    assert [line["response"]["text"] for line in lines] == ["r0", "r1", "r2", "r3"]
+    # each printed response names the prompt it answers
+    assert "--- RESPONSE 4 ---\nr3" in capsys.readouterr().out
+
+@pytest.mark.parametrize("concurrency", ["0", "-1"])
+def test_main_rejects_concurrency_below_one(concurrency, capsys):
+    with pytest.raises(SystemExit) as exc:
+        run_gemini.main(["--call", "--concurrency", concurrency])
+    assert exc.value.code == 2
+    assert "--concurrency must be at least 1" in capsys.readouterr().err
+
+def test_call_gemini_batch_rejects_zero_concurrency():
+    with pytest.raises(ValueError):
+        asyncio.run(run_gemini.call_gemini_batch(["p"], concurrency=0))
+
 if __name__ == "__main__":
     import pytest
     pytest.main(["-s", __file__])
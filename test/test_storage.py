@@ -0,0 +1,74 @@
+import os
+import re
+import sqlite3
+import pytest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import storage
+
+def test_init_db_shares_cache_entry_across_path_spellings(tmp_path, monkeypatch):
+    db_path = tmp_path / "data.db"
+    monkeypatch.setattr(storage, "DEFAULT_DB", db_path)
+    monkeypatch.chdir(tmp_path)
+
+    before = storage._init_db.cache_info()
+    assert storage.init_db() == db_path.resolve()
+    # None, the default Path, its str and a relative spelling all hit the same entry
+    storage.init_db(db_path)
+    storage.init_db(str(db_path))
+    storage.init_db("data.db")
+    after = storage._init_db.cache_info()
+    assert after.misses - before.misses == 1
+    assert after.hits - before.hits == 3
+
+def test_init_db_creates_schema_once(tmp_path):
+    db_path = tmp_path / "data.db"
+    storage.init_db(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("DROP TABLE inputs")
+        conn.commit()
+        # memoized: a second call must not reopen the file and recreate the table
+        storage.init_db(os.path.join(str(tmp_path), ".", "data.db"))
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        assert ("inputs",) not in tables
+    finally:
+        conn.close()
+
+def test_save_input_fills_created_at(tmp_path):
+    db_path = tmp_path / "data.db"
+    row_id = storage.save_input("hello", source="test", db_path=db_path)
+
+    records = storage.get_all(db_path=db_path)
+    assert records[0]["id"] == row_id
+    # ISO-8601 UTC with milliseconds, e.g. 2025-01-01T12:00:00.000Z
+    assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z", records[0]["created_at"])
+
+def test_old_inputs_table_is_migrated(tmp_path):
+    db_path = tmp_path / "data.db"
+    # schema used before created_at had a default
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE inputs (id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, "
+        "source TEXT, processed TEXT, created_at TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO inputs (text, source, processed, created_at) VALUES ('old', 'form', NULL, '2024-01-01T00:00:00')")
+    conn.execute("INSERT INTO inputs (text, source, processed, created_at) VALUES ('gone', 'form', NULL, '2024-01-02T00:00:00')")
+    conn.execute("DELETE FROM inputs WHERE text = 'gone'")
+    conn.commit()
+    conn.close()
+
+    row_id = storage.save_input("new", db_path=db_path)
+
+    # the AUTOINCREMENT counter survives the rebuild, so deleted ids are not reused
+    assert row_id == 3
+    records = storage.get_all(db_path=db_path)
+    assert [(r["id"], r["text"]) for r in records] == [(3, "new"), (1, "old")]
+    assert records[1]["created_at"] == "2024-01-01T00:00:00"
+    assert records[0]["created_at"].endswith("Z")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -9,13 +9,18 @@ Usage examples:
   # Actually call Gemini (requires GOOGLE_API_KEY set and google-generative-ai installed)
   python tools/run_gemini.py --source cloud --limit 3 --template-file prompts/sample.txt --call
 
+  # With aiohttp installed and GOOGLE_API_KEY set, --call sends requests to the Gemini REST API
+  # concurrently (default model gemini-2.5-flash); otherwise it calls the SDK one record at a time
+  python tools/run_gemini.py --source cloud --limit 50 --call --concurrency 16
+
 Supported sources:
   - cloud : reads from cloud_data.db (cloud_strings table)
   - inputs: reads from data/inputs.sqlite (inputs table, uses 'received' field if present)
 
 Outputs:
-  - Prints prompt -> response pairs to stdout
-  - Appends results to data/gemini_results.jsonl (one JSON per line)
+  - Prints every prompt, then each response as its call finishes; both are labelled
+    with the prompt's number ("--- PROMPT 3 ---" / "--- RESPONSE 3 ---") to pair them up
+  - Appends results to data/gemini_results.jsonl (one JSON per line, in input order)
 
 Note: This script attempts to call Gemini if --call is provided and an appropriate client is installed.
 If the client is not available it will explain how to install it and will not attempt the network call.
@@ -24,27 +29,121 @@ If the client is not available it will explain how to install it and will not at
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import os
+import queue
+import re
 import sqlite3
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, Callable, List, Dict, Any, Optional
+
+try:
+    import orjson  # optional: much faster JSON (de)serialization
+except ImportError:
+    orjson = None
 
 # Path from cloud storage (change in the future?)
 OUT_FILE = Path("data/gemini_results.jsonl")
+# Write buffer for OUT_FILE; results are flushed in large blocks rather than per line
+OUT_BUFFER_SIZE = 1 << 20
+# Results waiting for the background writer before the producer blocks
+RESULT_QUEUE_SIZE = 64
+# Read-only connection tuning: memory-mapped I/O window (256 MiB) and page cache (32 MiB)
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = 32768
+
+# Gemini REST endpoint used for concurrent calls (see call_gemini_async)
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+DEFAULT_CONCURRENCY = 16
+# Default models: generateContent (REST) needs a Gemini model; the legacy SDK path keeps its old default
+DEFAULT_REST_MODEL = "gemini-2.5-flash"
+DEFAULT_SDK_MODEL = "text-bison-001"
+# Called with (prompt index, response or exception) as each Gemini call finishes
+ResponseCallback = Callable[[int, Any], None]
+
+# Placeholders build_prompt knows how to fill; anything else in braces is left as-is
+PLACEHOLDER_RE = re.compile(r"\{(text|id|route|ts|received)\}")
+
+# A compiled prompt template: record -> filled prompt (see compile_template)
+PromptTemplate = Callable[[Dict[str, Any]], str]
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parse JSON with orjson when it is installed, otherwise the stdlib."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize to (non-ASCII-escaped) JSON with orjson when it is installed, otherwise the stdlib."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def json_dumpb(obj: Any) -> bytes:
+    """Like json_dumps but returns UTF-8 bytes, ready for a binary file."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def connect_readonly(db: Path) -> sqlite3.Connection:
+    """Open db read-only via a mode=ro URI, so reads never take the write-capable path."""
+    con = sqlite3.connect(db.resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        con.execute("PRAGMA query_only=1")
+        # map pages instead of one pread() each while walking large text rows
+        con.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        con.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    except Exception:
+        con.close()
+        raise
+    return con
+
+
+def _split_template(template: str) -> List[str]:
+    # re.split with one group alternates literal text and placeholder names
+    return PLACEHOLDER_RE.split(template)
+
 
+def _text_only(pieces: List[str]) -> bool:
+    # [before, "text", after] is exactly one placeholder, and it is {text}
+    return len(pieces) == 3 and pieces[1] == "text"
 
-def read_cloud_strings(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+
+def text_only_template(template: str) -> bool:
+    """True when the template's only placeholder is a single {text}."""
+    return _text_only(_split_template(template))
+
+
+def read_cloud_strings(limit: Optional[int] = None, prompt_template: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read cloud_strings rows (most recent first). If prompt_template is given (it must use
+    a single {text} and nothing else, see text_only_template) each row also carries a "prompt" built by SQLite's printf().
+    """
     db = Path("cloud_data.db")
     if not db.exists():
         return []
-    con = sqlite3.connect(str(db))
+    con = connect_readonly(db)
     try:
-        q = "SELECT id, text, created_at FROM cloud_strings ORDER BY id DESC"
+        # text may be stored as a UTF-8 blob when it was streamed in, so cast it back
+        q = "SELECT id, CAST(text AS TEXT) AS text, created_at AS ts"
+        params: tuple = ()
+        if prompt_template is not None:
+            fmt = prompt_template.replace("%", "%%").replace("{text}", "%s")
+            q += ", printf(?, CAST(text AS TEXT)) AS prompt"
+            params = (fmt,)
+        q += " FROM cloud_strings ORDER BY id DESC"
         if limit:
-            q += f" LIMIT {int(limit)}"
-        rows = con.execute(q).fetchall()
-        return [{"id": r[0], "text": r[1], "ts": r[2]} for r in rows]
+            # bind LIMIT so the SQL text, and its cached statement, is the same for any limit
+            q += " LIMIT ?"
+            params += (int(limit),)
+        con.row_factory = sqlite3.Row
+        return [dict(row) for row in con.execute(q, params)]
     finally:
         con.close()
 
@@ -53,18 +152,19 @@ def read_inputs(limit: Optional[int] = None) -> List[Dict[str, Any]]:
     db = Path("data/inputs.sqlite")
     if not db.exists():
         return []
-    con = sqlite3.connect(str(db))
+    con = connect_readonly(db)
     try:
         q = "SELECT id, route, received, result, ts FROM inputs ORDER BY id DESC"
+        params: tuple = ()
         if limit:
-            q += f" LIMIT {int(limit)}"
-        rows = con.execute(q).fetchall()
+            q += " LIMIT ?"
+            params = (int(limit),)
         out = []
-        for r in rows:
+        for r in con.execute(q, params):
             _id, route, received, result, ts = r
             # received/result are JSON strings in many cases
             try:
-                rec = json.loads(received) if received else received
+                rec = json_loads(received) if received else received
             except Exception:
                 rec = received
             out.append({"id": _id, "route": route, "received": rec, "result": result, "ts": ts})
@@ -73,8 +173,7 @@ def read_inputs(limit: Optional[int] = None) -> List[Dict[str, Any]]:
         con.close()
 
 
-def build_prompt(template: str, record: Dict[str, Any]) -> str:
-    # Provide commonly used placeholders: {text}, {received}, {id}, {route}, {ts}
+def _record_text(record: Dict[str, Any]) -> str:
     text = None
     if "text" in record:
         text = record["text"]
@@ -82,24 +181,65 @@ def build_prompt(template: str, record: Dict[str, Any]) -> str:
         # If received is dict with freeText or similar, try common keys
         rec = record["received"]
         if isinstance(rec, dict):
-            text = rec.get("freeText") or rec.get("text") or json.dumps(rec)
+            text = rec.get("freeText") or rec.get("text") or json_dumps(rec)
         else:
             text = str(rec)
-    else:
-        text = ""
+    return text or ""
 
-    filled = template.replace("{text}", text or "")
-    filled = filled.replace("{id}", str(record.get("id", "")))
-    filled = filled.replace("{route}", str(record.get("route", "")))
-    filled = filled.replace("{ts}", str(record.get("ts", "")))
+
+def _record_received(record: Dict[str, Any]) -> str:
     # also expose full received and result as JSON
     try:
-        filled = filled.replace("{received}", json.dumps(record.get("received", {})))
+        return json_dumps(record.get("received", {}))
     except Exception:
-        filled = filled.replace("{received}", str(record.get("received", "")))
-    return filled
+        return str(record.get("received", ""))
+
+
+def _record_field(name: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda record: str(record.get(name, ""))
+
 
-def build_with_extra_prompt(template: str, record: Dict[str, Any], extra_prompt: str) -> str:
+def compile_template(template: str) -> PromptTemplate:
+    """
+    Parse the template once into a function that fills a record in a single pass.
+    Only the placeholders actually present in the template are looked up or serialized.
+    """
+    pieces = _split_template(template)
+    # same test as text_only_template, so the SQL and Python fast paths agree
+    if _text_only(pieces):
+        # common case (e.g. the default template): a single {text} between fixed strings
+        prefix, _, suffix = pieces
+
+        def fill_text(record: Dict[str, Any]) -> str:
+            return prefix + _record_text(record) + suffix
+
+        return fill_text
+
+    parts: List[Any] = []
+    for i, piece in enumerate(pieces):
+        if i % 2 == 0:
+            if piece:
+                parts.append(piece)
+        elif piece == "text":
+            parts.append(_record_text)
+        elif piece == "received":
+            parts.append(_record_received)
+        else:
+            parts.append(_record_field(piece))
+
+    def fill(record: Dict[str, Any]) -> str:
+        return "".join([part if isinstance(part, str) else part(record) for part in parts])
+
+    return fill
+
+
+def build_prompt(template: str | PromptTemplate, record: Dict[str, Any]) -> str:
+    # Provide commonly used placeholders: {text}, {received}, {id}, {route}, {ts}
+    if isinstance(template, str):
+        template = compile_template(template)
+    return template(record)
+
+def build_with_extra_prompt(template: str | PromptTemplate, record: Dict[str, Any], extra_prompt: str) -> str:
     """
     Calls build_prompt() to fill placeholders, then prepends or appends
     an extra instruction or context text.
@@ -114,7 +254,7 @@ def build_with_extra_prompt(template: str, record: Dict[str, Any], extra_prompt:
 
     return combined
 
-def call_gemini(prompt: str, model: str = "text-bison-001") -> Dict[str, Any]:
+def call_gemini(prompt: str, model: str = DEFAULT_SDK_MODEL) -> Dict[str, Any]:
 
     #This function attempts multiple client libraries. If none are available it raises ImportError
     #with an instruction message.
@@ -176,6 +316,111 @@ def call_gemini(prompt: str, model: str = "text-bison-001") -> Dict[str, Any]:
         "No supported Google Generative AI client found. Install the official package (e.g. `pip install google-generative-ai`) and set GOOGLE_API_KEY, or run without --call to only print prompts."
     )
 
+async def call_gemini_async(session: Any, prompt: str, model: str = DEFAULT_REST_MODEL) -> Dict[str, Any]:
+    """
+    Call the Gemini REST generateContent endpoint directly on an aiohttp session,
+    bypassing the blocking SDK. Requires GOOGLE_API_KEY.
+    """
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY is not set; it is required to call the Gemini REST API.")
+
+    body = {"contents": [{"parts": [{"text": prompt}]}]}
+    headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
+    async with session.post(GEMINI_API_URL.format(model=model), data=json_dumpb(body), headers=headers) as resp:
+        payload = await resp.json(loads=json_loads, content_type=None)
+        if resp.status != 200:
+            message = payload.get("error", {}).get("message") if isinstance(payload, dict) else payload
+            raise RuntimeError(f"Gemini API returned HTTP {resp.status}: {message}")
+
+    candidates = payload.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts", [])
+    text = "".join(part.get("text", "") for part in parts)
+    return {"model": model, "text": text, "raw": json_dumps(payload)}
+
+
+async def call_gemini_batch(
+    prompts: List[str],
+    model: str = DEFAULT_REST_MODEL,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    on_response: Optional[ResponseCallback] = None,
+) -> List[Any]:
+    """
+    Run call_gemini_async for every prompt, at most `concurrency` requests in flight.
+    Returns responses in prompt order; failed calls are returned as their exception.
+    on_response(index, response) is called as each call finishes.
+    """
+    if concurrency < 1:
+        # Semaphore(0) would never let a request through
+        raise ValueError("concurrency must be at least 1")
+    import aiohttp
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession() as session:
+        async def bounded(index: int, prompt: str) -> Any:
+            async with semaphore:
+                try:
+                    resp: Any = await call_gemini_async(session, prompt, model=model)
+                except Exception as e:
+                    resp = e
+            if on_response is not None:
+                on_response(index, resp)
+            return resp
+
+        return await asyncio.gather(*(bounded(i, prompt) for i, prompt in enumerate(prompts)))
+
+
+def call_gemini_all(
+    prompts: List[str],
+    model: Optional[str] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    on_response: Optional[ResponseCallback] = None,
+) -> List[Any]:
+    """
+    Get a response (or the exception raised) for every prompt. Uses concurrent REST calls
+    when aiohttp is installed and GOOGLE_API_KEY is set; otherwise falls back to sequential
+    call_gemini(), which can also authenticate through the SDK (ADC, GOOGLE_API_KEY_JSON).
+    If model is None each path uses its own default model.
+    on_response(index, response) is called as each call finishes.
+    """
+    try:
+        import aiohttp  # noqa: F401
+        use_rest = bool(os.environ.get("GOOGLE_API_KEY"))
+    except ImportError:
+        use_rest = False
+    if use_rest:
+        return asyncio.run(call_gemini_batch(prompts, model or DEFAULT_REST_MODEL, concurrency, on_response))
+
+    responses: List[Any] = []
+    for i, prompt in enumerate(prompts):
+        try:
+            resp: Any = call_gemini(prompt, model=model or DEFAULT_SDK_MODEL)
+        except Exception as e:
+            resp = e
+        if on_response is not None:
+            on_response(i, resp)
+        responses.append(resp)
+    return responses
+
+
+def write_results(out: BinaryIO, results_queue: "queue.Queue[Optional[Dict[str, Any]]]") -> None:
+    """
+    Writer thread body: append each queued result to `out` as one JSON line until a
+    None sentinel arrives. A result that fails to serialize or write is reported and skipped
+    so the producer never blocks on a dead writer.
+    """
+    while True:
+        result = results_queue.get()
+        if result is None:
+            return
+        try:
+            out.write(json_dumpb(result))
+            out.write(b"\n")
+        except Exception as e:
+            print("Failed to write result:", e)
+
+
 def gemini_json_response(gemini_result: dict):
     """
     Helper to return only the Gemini text as a Next.js API JSON response.
@@ -202,16 +447,22 @@ def main(argv: Optional[List[str]] = None) -> int:
     p.add_argument("--template", type=str, help="Prompt template string. Use {text} or {received} placeholders.")
     p.add_argument("--template-file", type=str, help="Load template from a file")
     p.add_argument("--call", action="store_true", help="Actually call Gemini (requires client & API key). If omitted, prompts are printed only.")
-    p.add_argument("--model", type=str, default="text-bison-001", help="Model name to use if calling Gemini")
+    p.add_argument("--model", type=str, default=None, help=f"Model name to use if calling Gemini (default: {DEFAULT_REST_MODEL} over REST, {DEFAULT_SDK_MODEL} through the SDK)")
+    p.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max Gemini requests in flight with --call (needs aiohttp)")
     args = p.parse_args(argv)
+    if args.concurrency < 1:
+        p.error("--concurrency must be at least 1")
 
     if args.template_file:
         tmpl = Path(args.template_file).read_text(encoding="utf-8")
     else:
         tmpl = args.template or "Summarize the following text:\n\n{text}\n\nSummary:"
+    tmpl_obj = compile_template(tmpl)
 
     if args.source == "cloud":
-        records = read_cloud_strings(limit=args.limit)
+        # fixed {text}-only templates are filled in by SQLite while the rows are read
+        sql_template = tmpl if text_only_template(tmpl) else None
+        records = read_cloud_strings(limit=args.limit, prompt_template=sql_template)
     else:
         records = read_inputs(limit=args.limit)
 
@@ -221,26 +472,53 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    with OUT_FILE.open("a", encoding="utf-8") as out:
-        for rec in records:
-            prompt = build_prompt(tmpl, rec)
-            print("--- PROMPT ---")
-            print(prompt)
-
-            result: Dict[str, Any] = {"record": rec, "prompt": prompt, "response": None}
-            if args.call:
-                try:
-                    resp = call_gemini(prompt, model=args.model)
+    # Results are serialized and appended on a background thread, so disk writes overlap
+    # with prompt building and Gemini calls. Lines are queued in input order.
+    with OUT_FILE.open("ab", buffering=OUT_BUFFER_SIZE) as out:
+        results_queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+        writer = threading.Thread(target=write_results, args=(out, results_queue), daemon=True)
+        writer.start()
+        try:
+            results: List[Dict[str, Any]] = []
+            for number, rec in enumerate(records, 1):
+                prompt = rec.pop("prompt", None)
+                if prompt is None:
+                    prompt = build_prompt(tmpl_obj, rec)
+                print(f"--- PROMPT {number} ---")
+                print(prompt)
+                result: Dict[str, Any] = {"record": rec, "prompt": prompt, "response": None}
+                if args.call:
+                    results.append(result)
+                else:
+                    results_queue.put(result)
+
+            # calls finish out of order: hold finished results until every earlier one is queued
+            finished = [False] * len(results)
+            next_index = 0
+
+            def record_response(index: int, resp: Any) -> None:
+                nonlocal next_index
+                result = results[index]
+                if isinstance(resp, ImportError):
+                    print(f"Skipping Gemini call {index + 1}:", resp)
+                    result["error"] = str(resp)
+                elif isinstance(resp, Exception):
+                    print(f"Gemini call {index + 1} failed:", resp)
+                    result["error"] = str(resp)
+                else:
                     result["response"] = resp
-                    print("--- RESPONSE ---")
+                    print(f"--- RESPONSE {index + 1} ---")
                     print(resp.get("text") if isinstance(resp, dict) else resp)
-                except ImportError as ie:
-                    print("Skipping Gemini call:", ie)
-                    result["error"] = str(ie)
-                except Exception as e:
-                    print("Gemini call failed:", e)
-                    result["error"] = str(e)
-            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                finished[index] = True
+                while next_index < len(results) and finished[next_index]:
+                    results_queue.put(results[next_index])
+                    next_index += 1
+
+            if args.call:
+                call_gemini_all([r["prompt"] for r in results], args.model, args.concurrency, record_response)
+        finally:
+            results_queue.put(None)
+            writer.join()
 
     print(f"Wrote results/appended to {OUT_FILE}")
     return 0
@@ -0,0 +1,17 @@
+"""WSGI entry point for running the Flask API under gunicorn.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+gevent's monkey patching has to run before threading, queue and socket are
+imported anywhere, so this module patches first and only then imports the app.
+Patching makes sockets and the connection pool's locks and queues cooperative.
+It does not touch sqlite3: database calls still block the whole worker while
+they run.
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+from api import app  # noqa: E402
+
+application = app